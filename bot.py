@@ -1,20 +1,17 @@
 from slack_bolt import App
 from slack_bolt.adapter.socket_mode import SocketModeHandler
 import os
+import logging
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 # Import agent components
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
-from langgraph.prebuilt import create_react_agent
-from llms.base_classes.chatmodel import EinsteinChatModel
-from metadata_processor import get_metadata_information
-from org_utils import deploy_metadata
-from data_utils import fetch_object_fields_map, deploy_csv_records
-from org_connection import connect_to_salesforce_org, has_org_credentials
-from talk_to_agent import SYSTEM_INSTRUCTIONS
+from langchain_core.messages import HumanMessage
+from talk_to_agent import (
+    SYSTEM_MESSAGE, AGENT_CONFIG, CHAT_TOOLS, get_agent, get_last_agent_response, trim_conversation
+)
 
 # Slack configuration
 SLACK_BOT_TOKEN = os.environ.get('SLACK_BOT_TOKEN')
@@ -26,19 +23,16 @@ app = App(token=SLACK_BOT_TOKEN)
 # ============================================
 # INITIALIZE AGENT (once at startup)
 # ============================================
+# Same model, tools and prompt as the interactive chat (see talk_to_agent.py)
 print("🤖 Initializing OrgMagic Agent...")
-model = EinsteinChatModel(api_key="sample", disable_streaming=True)
-agent = create_react_agent(
-    model, 
-    tools=[connect_to_salesforce_org, get_metadata_information, deploy_metadata, fetch_object_fields_map, deploy_csv_records]
-)
+agent = get_agent(CHAT_TOOLS)
 print("✅ Agent initialized successfully!")
 
 # ============================================
 # CONVERSATION HISTORY STORAGE
 # ============================================
 # Single conversation history for all messages (single user support)
-conversation_messages = [SystemMessage(content=SYSTEM_INSTRUCTIONS)]
+conversation_messages = [SYSTEM_MESSAGE]
 
 
 @app.event("app_mention")
@@ -84,17 +78,13 @@ def respond_message(message, say):
         print("🤔 Agent thinking...")
         result = agent.invoke({
             "messages": conversation_messages
-        })
+        }, config=AGENT_CONFIG)
         
         # Update conversation history with all messages (including tool calls and results)
         conversation_messages = result['messages']
         
         # Extract agent's final response
-        agent_responses = [msg for msg in conversation_messages if isinstance(msg, AIMessage)]
-        if agent_responses:
-            agent_response = agent_responses[-1].content
-        else:
-            agent_response = conversation_messages[-1].content if conversation_messages else "No response"
+        agent_response = get_last_agent_response(conversation_messages)
         
         # Determine thread timestamp (reply in thread if it's a thread, otherwise create new thread)
         reply_thread_ts = thread_ts or event_ts
@@ -108,6 +98,10 @@ def respond_message(message, say):
         
         print(f"✅ Response sent to {user_id}")
         
+        # Keep the history sent to the model bounded for the next message
+        # (after replying, since this may call the model)
+        conversation_messages = trim_conversation(conversation_messages)
+        
     except Exception as e:
         error_msg = f"❌ Error processing message: {str(e)}"
         print(error_msg)
@@ -124,5 +118,6 @@ def respond_message(message, say):
             print(f"Warning: Failed to remove :eyes: reaction: {e}")
 
 if __name__=="__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     handler=SocketModeHandler(app,SLACK_APP_TOKEN)
     handler.start()
@@ -1,9 +1,11 @@
 import requests
+import requests.adapters
 import csv
 import os
 import json
 import time
 import io
+import threading
 from langchain_core.tools import tool
 from dotenv import load_dotenv
 from org_connection import get_stored_org_credentials
@@ -11,6 +13,56 @@ from org_connection import get_stored_org_credentials
 # Load environment variables from .env file (fallback)
 load_dotenv()
 
+# --------------------------------------------------------
+# HTTP SESSION
+# --------------------------------------------------------
+# Shared session so describe and Bulk API calls reuse pooled keep-alive
+# connections instead of opening a new TCP/TLS connection per request.
+# Auth headers are passed per request since credentials can change.
+_SESSION = requests.Session()
+_SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=20))
+
+# Bulk API job polling: first delay (seconds) and the cap it doubles up to
+BULK_POLL_INITIAL_DELAY = 1
+BULK_POLL_MAX_DELAY = 5
+
+# --------------------------------------------------------
+# DESCRIBE CACHE
+# --------------------------------------------------------
+# Object describe results rarely change during a session, so field maps are
+# cached per (instance_url, api_version, sobject) for a limited time.
+FIELDS_CACHE_TTL = 600  # seconds
+FIELDS_CACHE_MAXSIZE = 256
+_fields_cache = {}
+# fetch_object_fields_map calls run in parallel on the agent's tool threads
+_fields_cache_lock = threading.Lock()
+
+
+def _get_cached_fields(key):
+    with _fields_cache_lock:
+        entry = _fields_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, field_info = entry
+        if time.monotonic() >= expires_at:
+            del _fields_cache[key]
+            return None
+        return field_info
+
+
+def _set_cached_fields(key, field_info):
+    with _fields_cache_lock:
+        if key not in _fields_cache and len(_fields_cache) >= FIELDS_CACHE_MAXSIZE:
+            # Evict the oldest entry (dicts keep insertion order)
+            del _fields_cache[next(iter(_fields_cache))]
+        _fields_cache[key] = (time.monotonic() + FIELDS_CACHE_TTL, field_info)
+
+
+def clear_object_fields_cache():
+    """Drop all cached field maps, e.g. after deploying metadata that may add fields."""
+    with _fields_cache_lock:
+        _fields_cache.clear()
+
 # --------------------------------------------------------
 # ORG CONFIGURATION
 # --------------------------------------------------------
@@ -105,6 +157,12 @@ def fetch_object_fields_map(sobject: str) -> dict:
             "error": "No Salesforce org connected. Please use the connect_to_salesforce_org tool first to provide your org credentials (instance_url, username, password)."
         }
     
+    cache_key = (instance_url, api_version, sobject)
+    cached = _get_cached_fields(cache_key)
+    if cached is not None:
+        print(f"Using cached field information for {sobject}")
+        return {name: dict(info) for name, info in cached.items()}
+    
     query_url = (
         f"{instance_url}/services/data/v{api_version}/sobjects/{sobject}/describe/"
     )
@@ -114,53 +172,61 @@ def fetch_object_fields_map(sobject: str) -> dict:
         "Content-Type": "application/json",
     }
 
-    response = requests.get(query_url, headers=headers, timeout=30)
+    response = _SESSION.get(query_url, headers=headers, timeout=30)
     response.raise_for_status()
-    data = response.json()
+    # Keep only the field list; the rest of the describe payload (child
+    # relationships, record types, URLs, ...) is released right away
+    fields = response.json().get("fields", [])
+    del response
 
     # Build a comprehensive field information dictionary
     # Include all createable fields with their types and required status
     field_info = {}
     
-    for field in data.get("fields", []):
+    for field in fields:
+        get = field.get
         # Only include fields that can be set during record creation
-        if field.get("createable", False):
-            api_name = field.get("name")  # API name (needed for CSV)
-            label = field.get("label")  # Label for display
-            field_type = field.get("type")
+        if get("createable", False):
+            api_name = get("name")  # API name (needed for CSV)
+            label = get("label")  # Label for display
+            field_type = get("type")
+            nillable = get("nillable", True)
+            defaulted_on_create = get("defaultedOnCreate", False)
             
             # Determine if field is required
             # A field is required if it's not nullable AND not defaulted on create
-            is_required = (
-                not field.get("nillable", True) 
-                and not field.get("defaultedOnCreate", False)
-            )
+            is_required = not nillable and not defaulted_on_create
             
             # Store information with API name as key (since CSV uses API names)
             field_info[api_name] = {
                 "label": label,
                 "type": field_type,
                 "required": is_required,
-                "nillable": field.get("nillable", True),
-                "defaultedOnCreate": field.get("defaultedOnCreate", False)
+                "nillable": nillable,
+                "defaultedOnCreate": defaulted_on_create
             }
     
     print(f"Found {len(field_info)} createable fields for {sobject}")
     print(f"Required fields: {[name for name, info in field_info.items() if info['required']]}")
     
-    return field_info
+    _set_cached_fields(cache_key, field_info)
+    return {name: dict(info) for name, info in field_info.items()}
 
 
-def _deploy_csv_records_internal(records: list, sobject: str) -> dict:
+def _deploy_csv_records_internal(records: list, sobject: str, wait_for_completion: bool = True) -> dict:
     """
     Internal function to deploy records to Salesforce using Bulk API 2.0.
     
     Args:
         records: List of dictionaries representing records to deploy
         sobject: The API name of the Salesforce SObject
+        wait_for_completion: If False, return as soon as the data is uploaded and
+                             the job is queued for processing, without polling.
+                             Use _get_bulk_job_status(job_id) to check on it later.
     
     Returns:
-        Dictionary containing deployment results
+        Dictionary containing deployment results (includes "job_id" once the
+        job has been created)
     """
     if not records:
         return {
@@ -225,10 +291,11 @@ def _deploy_csv_records_internal(records: list, sobject: str) -> dict:
     }
     
     try:
-        response = requests.post(bulk_api_base, headers=json_headers, json=job_payload, timeout=30)
+        response = _SESSION.post(bulk_api_base, headers=json_headers, json=job_payload, timeout=30)
         response.raise_for_status()
         job_info = response.json()
         job_id = job_info.get("id")
+        all_results["job_id"] = job_id
         print(f"Job created successfully. Job ID: {job_id}")
     except requests.exceptions.RequestException as e:
         error_msg = f"Failed to create bulk job: {str(e)}"
@@ -260,7 +327,7 @@ def _deploy_csv_records_internal(records: list, sobject: str) -> dict:
     csv_content = csv_content.replace('\r\n', '\n').replace('\r', '\n')
     
     try:
-        response = requests.put(upload_url, headers=csv_headers, data=csv_content.encode('utf-8'), timeout=60)
+        response = _SESSION.put(upload_url, headers=csv_headers, data=csv_content.encode('utf-8'), timeout=60)
         response.raise_for_status()
         print("CSV data uploaded successfully")
     except requests.exceptions.RequestException as e:
@@ -280,7 +347,7 @@ def _deploy_csv_records_internal(records: list, sobject: str) -> dict:
     close_payload = {"state": "UploadComplete"}
     
     try:
-        response = requests.patch(close_url, headers=json_headers, json=close_payload, timeout=30)
+        response = _SESSION.patch(close_url, headers=json_headers, json=close_payload, timeout=30)
         response.raise_for_status()
         print("Job closed successfully. Processing started...")
     except requests.exceptions.RequestException as e:
@@ -292,6 +359,12 @@ def _deploy_csv_records_internal(records: list, sobject: str) -> dict:
         all_results["errors"].append({"step": "close_job", "error": error_msg})
         return all_results
     
+    if not wait_for_completion:
+        # Salesforce processes the job in the background; results are
+        # fetched later with _get_bulk_job_status(job_id)
+        all_results["state"] = "UploadComplete"
+        return all_results
+    
     # ---------------------------
     # Step 4: Poll Job Status
     # ---------------------------
@@ -299,12 +372,12 @@ def _deploy_csv_records_internal(records: list, sobject: str) -> dict:
     status_url = f"{bulk_api_base}/{job_id}"
     
     max_wait_time = 300  # 5 minutes max wait
-    poll_interval = 3  # Poll every 3 seconds
+    poll_interval = BULK_POLL_INITIAL_DELAY  # Doubles up to BULK_POLL_MAX_DELAY
     elapsed_time = 0
     
     while elapsed_time < max_wait_time:
         try:
-            response = requests.get(status_url, headers=json_headers, timeout=30)
+            response = _SESSION.get(status_url, headers=json_headers, timeout=30)
             response.raise_for_status()
             job_status = response.json()
             
@@ -320,13 +393,12 @@ def _deploy_csv_records_internal(records: list, sobject: str) -> dict:
                 all_results["success"] = False
                 all_results["errors"].append({"step": "job_processing", "error": error_msg})
                 return all_results
-            elif state in ["InProgress", "Open"]:
-                time.sleep(poll_interval)
-                elapsed_time += poll_interval
             else:
-                print(f"Unknown state: {state}, continuing to poll...")
+                if state not in ["InProgress", "Open", "UploadComplete"]:
+                    print(f"Unknown state: {state}, continuing to poll...")
                 time.sleep(poll_interval)
                 elapsed_time += poll_interval
+                poll_interval = min(poll_interval * 2, BULK_POLL_MAX_DELAY)
                 
         except requests.exceptions.RequestException as e:
             error_msg = f"Error polling job status: {str(e)}"
@@ -345,12 +417,20 @@ def _deploy_csv_records_internal(records: list, sobject: str) -> dict:
     # ---------------------------
     # Step 5: Get Results
     # ---------------------------
+    return _collect_bulk_job_results(bulk_api_base, job_id, json_headers, all_results)
+
+
+def _collect_bulk_job_results(bulk_api_base: str, job_id: str, json_headers: dict, all_results: dict) -> dict:
+    """
+    Fetch the successful and failed records of a completed Bulk API 2.0 job
+    and fold them into all_results.
+    """
     print("\nStep 5: Retrieving results...")
     
     # Get successful results
     success_url = f"{bulk_api_base}/{job_id}/successfulResults"
     try:
-        response = requests.get(success_url, headers=json_headers, timeout=30)
+        response = _SESSION.get(success_url, headers=json_headers, timeout=30)
         response.raise_for_status()
         success_content = response.text
         if success_content:
@@ -367,7 +447,7 @@ def _deploy_csv_records_internal(records: list, sobject: str) -> dict:
     # Get failed results
     failed_url = f"{bulk_api_base}/{job_id}/failedResults"
     try:
-        response = requests.get(failed_url, headers=json_headers, timeout=30)
+        response = _SESSION.get(failed_url, headers=json_headers, timeout=30)
         response.raise_for_status()
         failed_content = response.text
         if failed_content:
@@ -400,6 +480,66 @@ def _deploy_csv_records_internal(records: list, sobject: str) -> dict:
     return all_results
 
 
+def _get_bulk_job_status(job_id: str) -> dict:
+    """
+    Check a Bulk API 2.0 ingest job once, without waiting.
+    
+    Args:
+        job_id: The ingest job ID returned when the records were submitted
+    
+    Returns:
+        Dictionary with the job "state" and its "sobject", plus the same result
+        fields as _deploy_csv_records_internal once the job has finished
+    """
+    instance_url = get_org_instance_url()
+    access_token = get_org_access_token()
+    api_version = get_org_api_version()
+    
+    all_results = {
+        "success": False,
+        "job_id": job_id,
+        "sobject": None,
+        "state": None,
+        "total_records": 0,
+        "successful": 0,
+        "failed": 0,
+        "errors": [],
+        "created_ids": []
+    }
+    
+    if not instance_url or not access_token:
+        all_results["errors"].append("No Salesforce org connected. Please use the connect_to_salesforce_org tool first.")
+        return all_results
+    
+    json_headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json",
+    }
+    bulk_api_base = f"{instance_url}/services/data/v{api_version}/jobs/ingest"
+    
+    try:
+        response = _SESSION.get(f"{bulk_api_base}/{job_id}", headers=json_headers, timeout=30)
+        response.raise_for_status()
+        job_status = response.json()
+    except requests.exceptions.RequestException as e:
+        all_results["errors"].append({"step": "poll_status", "error": f"Error polling job status: {str(e)}"})
+        return all_results
+    
+    state = job_status.get("state")
+    all_results["state"] = state
+    all_results["sobject"] = job_status.get("object")
+    all_results["total_records"] = job_status.get("numberRecordsProcessed", 0)
+    
+    if state == "JobComplete":
+        return _collect_bulk_job_results(bulk_api_base, job_id, json_headers, all_results)
+    if state in ("Failed", "Aborted"):
+        all_results["errors"].append({
+            "step": "job_processing",
+            "error": f"Job {state.lower()}: {job_status.get('errorMessage', 'Unknown error')}"
+        })
+    return all_results
+
+
 def deploy_csv_data(csv_file_path: str, sobject: str) -> dict:
     """
     Deploy data from a CSV file to a Salesforce org.
@@ -450,8 +590,19 @@ def deploy_csv_data(csv_file_path: str, sobject: str) -> dict:
     return _deploy_csv_records_internal(records, sobject)
 
 
+def _format_deploy_result(result: dict, sobject: str) -> str:
+    """Format a finished Bulk API deployment result as a user-friendly string."""
+    if result["success"]:
+        return f"✅ Successfully deployed {result['successful']} out of {result['total_records']} records to {sobject}. Created record IDs: {', '.join(result['created_ids'][:10])}" + (f" (and {len(result['created_ids']) - 10} more)" if len(result['created_ids']) > 10 else "")
+    else:
+        error_summary = f"❌ Deployment completed with errors. {result['successful']} successful, {result['failed']} failed out of {result['total_records']} total records."
+        if result['errors']:
+            error_summary += f"\nErrors: {result['errors'][:3]}"  # Show first 3 errors
+        return error_summary
+
+
 @tool
-def deploy_csv_records(csv_content: str, sobject: str) -> str:
+def deploy_csv_records(csv_content: str, sobject: str, wait_for_completion: bool = True) -> str:
     """Deploy CSV records to a Salesforce org.
     
     This tool accepts CSV content as a string and deploys the records to the specified
@@ -468,9 +619,14 @@ def deploy_csv_records(csv_content: str, sobject: str) -> str:
                     "Name,Phone,Website\nAcme Corp,555-0100,https://acme.com\nGlobal Inc,555-0200,https://global.com"
         sobject: The API name of the Salesforce SObject (e.g., "Account", "Contact", 
                 "CustomObject__c", etc.). Use the exact API name as it appears in Salesforce.
+        wait_for_completion: If True (default), wait for Salesforce to finish processing
+                    and report the results. If False, return the Bulk API job ID as soon
+                    as the records are uploaded so other work can continue; use
+                    check_csv_deploy_status with that job ID to get the results later.
     
     Returns:
-        A string describing the deployment result, including:
+        A string describing the deployment result (or the submitted job ID when
+        wait_for_completion is False), including:
         - Total number of records processed
         - Number of successful and failed records
         - Error details if any records failed
@@ -499,16 +655,41 @@ def deploy_csv_records(csv_content: str, sobject: str) -> str:
         return "Error: No valid records found in CSV content. Please ensure the CSV has a header row and at least one data row."
     
     # Deploy using internal function
-    result = _deploy_csv_records_internal(records, sobject)
+    result = _deploy_csv_records_internal(records, sobject, wait_for_completion=wait_for_completion)
+    
+    if not wait_for_completion and result.get("state") == "UploadComplete":
+        return f"⏳ Submitted {result['total_records']} {sobject} records for processing. Bulk API job ID: {result['job_id']}. Use check_csv_deploy_status with this job ID to get the results."
     
     # Format result as a user-friendly string
-    if result["success"]:
-        return f"✅ Successfully deployed {result['successful']} out of {result['total_records']} records to {sobject}. Created record IDs: {', '.join(result['created_ids'][:10])}" + (f" (and {len(result['created_ids']) - 10} more)" if len(result['created_ids']) > 10 else "")
-    else:
-        error_summary = f"❌ Deployment completed with errors. {result['successful']} successful, {result['failed']} failed out of {result['total_records']} total records."
-        if result['errors']:
-            error_summary += f"\nErrors: {result['errors'][:3]}"  # Show first 3 errors
-        return error_summary
+    return _format_deploy_result(result, sobject)
+
+
+@tool
+def check_csv_deploy_status(job_id: str) -> str:
+    """Check the status of a CSV records deployment submitted without waiting.
+    
+    Use this tool with the Bulk API job ID returned by deploy_csv_records when it
+    was called with wait_for_completion=False. It checks the job once and returns
+    immediately.
+    
+    Args:
+        job_id: The Bulk API job ID returned by deploy_csv_records
+    
+    Returns:
+        A string with the job state while it is still processing, or the
+        deployment results (successful/failed counts, errors, created record IDs)
+        once it has finished
+    """
+    result = _get_bulk_job_status(job_id)
+    state = result["state"]
+    
+    if state == "JobComplete":
+        return _format_deploy_result(result, result["sobject"] or f"the records of job {job_id}")
+    if state in ("Failed", "Aborted"):
+        return f"❌ Bulk API job {job_id} {state.lower()}. Errors: {result['errors'][:3]}"
+    if state is None:
+        return f"Error: Could not get the status of job {job_id}. Errors: {result['errors'][:3]}"
+    return f"⏳ Bulk API job {job_id} is still processing (state: {state}). Check again shortly."
 
 
 # --------------------------------------------------------
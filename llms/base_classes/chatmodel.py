@@ -166,8 +166,20 @@ class EinsteinChatModel(BaseChatOpenAI):
 
         return formatted
 
-    def _prepare_payload(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, stream: bool = False) -> Dict[str, Any]:
-        """Prepare the full payload for the /chat/generations or /chat/generations/stream endpoint."""
+    def _prepare_payload(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        stream: bool = False,
+        tools: Optional[List[DictStrAny]] = None,
+        tool_config: Optional[DictStrAny] = None,
+    ) -> Dict[str, Any]:
+        """Prepare the full payload for the /chat/generations or /chat/generations/stream endpoint.
+
+        tools/tool_config are passed in (already resolved against any bound
+        overrides) rather than read from self, so concurrent calls on a shared
+        model instance never see each other's tools.
+        """
         # --- Generation Settings ---
         generation_settings: Dict[str, Any] = {"num_generations": self.num_generations}
         # Ensure n=1 for streaming if required by API
@@ -208,8 +220,8 @@ class EinsteinChatModel(BaseChatOpenAI):
             "slots_to_data": self.slots_to_data,
             "debug_settings": self.debug_settings,
             "system_prompt_strategy": self.system_prompt_strategy,
-            "tools": self.tools, # Add tools if provided (e.g., by with_structured_output)
-            "tool_config": self.tool_config, # Add tool_config if provided
+            "tools": tools, # Add tools if provided (e.g., by with_structured_output)
+            "tool_config": tool_config, # Add tool_config if provided
         }
         for key, value in optional_settings_map.items():
             if value is not None:
@@ -436,17 +448,9 @@ class EinsteinChatModel(BaseChatOpenAI):
         current_tools = kwargs.get("tools", self.tools)
         current_tool_config = kwargs.get("tool_config", self.tool_config)
 
-        # Temporarily update self.tools for _prepare_payload if overridden
-        original_tools = self.tools
-        original_tool_config = self.tool_config
-        try:
-            self.tools = current_tools
-            self.tool_config = current_tool_config
-            payload = self._prepare_payload(messages, stop=stop)
-        finally:
-            # Restore original values
-            self.tools = original_tools
-            self.tool_config = original_tool_config
+        payload = self._prepare_payload(
+            messages, stop=stop, tools=current_tools, tool_config=current_tool_config
+        )
 
         response_data = self._make_request(payload)
         return self._process_response(response_data)
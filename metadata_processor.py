@@ -1,5 +1,6 @@
 from bs4 import BeautifulSoup
 import os
+import functools
 import xml.etree.ElementTree as ET
 from xml.dom import minidom
 import json
@@ -7,11 +8,18 @@ from langchain_core.tools import tool
 
 
 def metadata_information_for_metadata_type(type):
+    # Return fresh dicts so callers can't modify the cached parse result
+    return [dict(field) for field in _parse_metadata_information(type)]
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_metadata_information(type):
+    """Parse the resources HTML for a metadata type (cached, the files are static)."""
     file_path = f'resources/{type}.html'
 
     # Check if the file exists
     if not os.path.exists(file_path):
-        return []  # Return an empty list if the file does not exist
+        return ()  # Return an empty result if the file does not exist
     
     #print(f'\n ******** Metadata information file found. Processing {file_path} ...   ******* \n')
     # Read the HTML file
@@ -28,6 +36,9 @@ def metadata_information_for_metadata_type(type):
     if table:
         # Extract table header
         headers = [header.find(string=True) for header in table.find('thead').find_all('th')]
+        # Use plain str keys: a NavigableString links back into the soup via
+        # .parent, which would keep every parsed page alive in the cache
+        headers = [str(header) if header is not None else None for header in headers]
         # Extract table rows
         rows = table.find('tbody').find_all('tr')
 
@@ -49,11 +60,27 @@ def metadata_information_for_metadata_type(type):
         # for field in fields:
         #     print(field)
         
-        return fields
+        return tuple(fields)
     #print(fields)
     else:
         print("Table with class 'featureTable' not found.")
-        return []
+        return ()
+
+
+def prefetch_metadata_information(text):
+    """Warm the metadata information cache for every metadata type named in text.
+    
+    Meant to run in the background right after the user submits a message, so
+    the parse is usually done by the time the agent calls get_metadata_information.
+    
+    Returns:
+        List of the metadata types that were prefetched
+    """
+    lowered = text.lower()
+    matched = [t for t in _get_available_metadata_types() if t.lower() in lowered]
+    for metadata_type in matched:
+        _parse_metadata_information(metadata_type)
+    return matched
 
 
 def _get_available_metadata_types():
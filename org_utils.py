@@ -1,20 +1,50 @@
 import os
+import logging
 import zipfile
 import io
 import time
 import json
-import uuid
+import secrets
 import requests
 import xml.etree.ElementTree as ET
 import yaml
 import re
+import functools
+from typing import Union
 from langchain_core.tools import tool
 from dotenv import load_dotenv
 from org_connection import get_stored_org_credentials
+from data_utils import clear_object_fields_cache
 
 # Load environment variables from .env file (fallback)
 load_dotenv()
 
+# Serialize parsed metadata with the Metadata API namespace as the default
+# namespace (instead of ElementTree's generated "ns0:" prefix)
+METADATA_NAMESPACE = "http://soap.sforce.com/2006/04/metadata"
+ET.register_namespace("", METADATA_NAMESPACE)
+
+# Deploy status polling: first delay (seconds) and the cap it doubles up to
+DEPLOY_POLL_INITIAL_DELAY = 0.5
+DEPLOY_POLL_MAX_DELAY = 3
+
+# --- Logging Setup ---
+# Deploy progress is logged at INFO; verbose diagnostics (package.xml, ZIP
+# listing, full deploy JSON) at DEBUG. ORG_DEBUG=1 enables the latter.
+logger = logging.getLogger(__name__)
+if os.getenv("ORG_DEBUG", "0") == "1":
+    logger.setLevel(logging.DEBUG)
+
+# Constant part headers of the multipart deployRequest body
+_MULTIPART_JSON_HEADER = (
+    b'Content-Disposition: form-data; name="json"\r\n'
+    b'Content-Type: application/json\r\n\r\n'
+)
+_MULTIPART_ZIP_HEADER = (
+    b'Content-Disposition: form-data; name="file"; filename="metadata.zip"\r\n'
+    b'Content-Type: application/zip\r\n\r\n'
+)
+
 # --------------------------------------------------------
 # ORG CONFIGURATION
 # --------------------------------------------------------
@@ -47,14 +77,137 @@ def get_org_api_version():
     return api_version
 
 
-def deploy_metadata_xml(instance_url: str, access_token: str, metadata_xml: str, api_version: str = "61.0"):
+# --------------------------------------------------------
+# METADATA FILENAME RULES
+# --------------------------------------------------------
+# Each rule receives (fields, extension), where fields maps top-level element
+# names (always "fullName", plus any listed in _FILENAME_FIELDS) to their text,
+# and returns the file name (without the -meta.xml suffix) used inside the
+# deploy ZIP. Metadata types without a rule use "<fullName>.<extension>".
+def _default_filename(fields: dict, extension: str) -> str:
+    return f"{fields['fullName']}.{extension}"
+
+
+def _custom_object_filename(fields: dict, extension: str) -> str:
+    label = fields.get("label")
+    if label:
+        return label.replace(' ', '') + f'__c.{extension}'
+    return f"{fields['fullName']}.{extension}"
+
+
+def _remote_site_setting_filename(fields: dict, extension: str) -> str:
+    return fields["fullName"].replace(' ', '') + f'.{extension}'
+
+
+def _survey_settings_filename(fields: dict, extension: str) -> str:
+    return f'Survey.{extension}'
+
+
+_FILENAME_RULES = {
+    "CustomObject": _custom_object_filename,
+    "RemoteSiteSetting": _remote_site_setting_filename,
+    "SurveySettings": _survey_settings_filename,
+}
+
+# Extra top-level elements a filename rule reads, besides fullName
+_FILENAME_FIELDS = {
+    "CustomObject": ("label",),
+}
+
+# Size of the chunks fed to the pull parser when scanning metadata XML
+_XML_SCAN_CHUNK_SIZE = 64 * 1024
+
+
+def _split_tag(tag: str) -> tuple:
+    """Split an ElementTree tag into ("{namespace}", local_name)."""
+    if "}" in tag:
+        namespace, local_name = tag[1:].split("}", 1)
+        return "{" + namespace + "}", local_name
+    return "", tag
+
+
+def _scan_metadata_xml(metadata_xml: Union[str, bytes]) -> tuple:
+    """Read the metadata type and the top-level fields needed for deployment.
+    
+    Streams the document through an XMLPullParser instead of building the full
+    tree: top-level elements are discarded as soon as they are closed, so
+    large CustomObjects (hundreds of fields) never sit in memory as a complete
+    tree. The whole document is still parsed, so malformed XML raises
+    ET.ParseError here rather than failing later on Salesforce.
+    
+    Returns:
+        Tuple of (metadata_type, fields) where fields maps top-level element
+        names to their text
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    metadata_type = None
+    wanted = {"fullName"}
+    fields = {}
+    root = None
+    depth = 0
+
+    for offset in range(0, len(metadata_xml), _XML_SCAN_CHUNK_SIZE):
+        parser.feed(metadata_xml[offset:offset + _XML_SCAN_CHUNK_SIZE])
+        for event, elem in parser.read_events():
+            if event == "start":
+                depth += 1
+                if depth == 1:
+                    root = elem
+                    _, metadata_type = _split_tag(elem.tag)
+                    wanted.update(_FILENAME_FIELDS.get(metadata_type, ()))
+                continue
+
+            depth -= 1
+            if depth == 1:
+                _, name = _split_tag(elem.tag)
+                if name in wanted and name not in fields:
+                    fields[name] = elem.text
+                # Drop finished top-level elements to keep memory flat
+                root.clear()
+
+    # Checks the document is complete and well-formed
+    parser.close()
+    return metadata_type, fields
+
+
+def _element_fields(root: ET.Element) -> tuple:
+    """Same as _scan_metadata_xml, for an already parsed root element."""
+    namespace, metadata_type = _split_tag(root.tag)
+    fields = {}
+    for name in ("fullName",) + _FILENAME_FIELDS.get(metadata_type, ()):
+        elem = root.find(f"{namespace}{name}")
+        if elem is not None:
+            fields[name] = elem.text
+    return metadata_type, fields
+
+
+@functools.lru_cache(maxsize=256)
+def _build_package_xml(name: str, member: str, api_version: str) -> bytes:
+    """Build the encoded package.xml for a single metadata member.
+    
+    Cached because deploys overwhelmingly reuse the same API version and a
+    handful of (name, member) pairs.
+    """
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<Package xmlns="http://soap.sforce.com/2006/04/metadata">
+    <types>
+        <members>{member}</members>
+        <name>{name}</name>
+    </types>
+    <version>{api_version}</version>
+</Package>
+""".encode('utf-8')
+
+
+def deploy_metadata_xml(instance_url: str, access_token: str, metadata_xml: Union[str, bytes, ET.Element], api_version: str = "61.0"):
     """
     Deploy a single metadata XML to Salesforce using REST Metadata API.
     
     Args:
         instance_url: Salesforce instance URL (e.g., 'https://mycompany.salesforce.com')
         access_token: OAuth access token
-        metadata_xml: The metadata XML string to deploy
+        metadata_xml: The metadata XML to deploy, either as a string/bytes or as an
+                      already parsed ElementTree root element (skips re-parsing)
         api_version: API version to use (default: "61.0")
     
     Returns:
@@ -71,30 +224,25 @@ def deploy_metadata_xml(instance_url: str, access_token: str, metadata_xml: str,
         result = deploy_metadata_xml(instance_url, access_token, xml)
     """
     
-    print("\n=== Starting Metadata Deploy ===")
+    logger.info("=== Starting Metadata Deploy ===")
 
     # ---------------------------
     # 1. Parse XML to extract metadata type and name
     # ---------------------------
-    root = ET.fromstring(metadata_xml)
-    
-    # Extract namespace
-    if "}" in root.tag:
-        namespace = "{" + root.tag.split("}")[0].replace("{", "") + "}"
+    # Extract metadata type (e.g., "RemoteSiteSetting", "CustomObject") along
+    # with fullName and any other top-level fields the filename rule needs
+    if isinstance(metadata_xml, ET.Element):
+        metadata_type, fields = _element_fields(metadata_xml)
+        metadata_xml = ET.tostring(metadata_xml, encoding="UTF-8", xml_declaration=True)
     else:
-        namespace = ""
-    
-    # Extract metadata type (e.g., "RemoteSiteSetting", "CustomObject")
-    metadata_type = root.tag.replace(namespace, "")
+        metadata_type, fields = _scan_metadata_xml(metadata_xml)
     
-    # Extract fullName
-    fullName_elem = root.find(f"{namespace}fullName")
-    if fullName_elem is None:
+    if "fullName" not in fields:
         raise ValueError("Metadata XML must contain a <fullName> element.")
-    fullName = fullName_elem.text
+    fullName = fields["fullName"]
 
-    print(f"Detected metadata type: {metadata_type}")
-    print(f"Detected name: {fullName}")
+    logger.info("Detected metadata type: %s", metadata_type)
+    logger.info("Detected name: %s", fullName)
 
     # ---------------------------
     # 2. Determine folder name and file extension from metadata_map.yml
@@ -112,10 +260,8 @@ def deploy_metadata_xml(instance_url: str, access_token: str, metadata_xml: str,
             entry
             for entry in metadata_map
             if any(
-                [
-                    subentry["type"] == metadata_type
-                    for subentry in metadata_map[entry]
-                ]
+                subentry["type"] == metadata_type
+                for subentry in metadata_map[entry]
             )
         ]
         
@@ -131,21 +277,8 @@ def deploy_metadata_xml(instance_url: str, access_token: str, metadata_xml: str,
     # ---------------------------
     # 3. Get the correct filename (handling special cases)
     # ---------------------------
-    if metadata_type == 'CustomObject':
-        label_elem = root.find(f"{namespace}label")
-        if label_elem is not None and label_elem.text:
-            metadata_filename = label_elem.text.replace(' ', '')
-            metadata_filename += f'__c.{extension}'
-        else:
-            metadata_filename = f"{fullName}.{extension}"
-    elif metadata_type == 'RemoteSiteSetting':
-        metadata_filename = fullName.replace(' ', '')
-        metadata_filename += f'.{extension}'
-    elif metadata_type == 'SurveySettings':
-        metadata_filename = 'Survey'
-        metadata_filename += f'.{extension}'
-    else:
-        metadata_filename = f"{fullName}.{extension}"
+    filename_rule = _FILENAME_RULES.get(metadata_type, _default_filename)
+    metadata_filename = filename_rule(fields, extension)
     
     # Filename must include -meta.xml suffix
     if not metadata_filename.endswith("-meta.xml"):
@@ -165,31 +298,21 @@ def deploy_metadata_xml(instance_url: str, access_token: str, metadata_xml: str,
         package_xml_name = metadata_type
         package_xml_member = fullName
     
-    print(f"Package.xml name: {package_xml_name}")
-    print(f"Package.xml member: {package_xml_member}")
+    logger.info("Package.xml name: %s", package_xml_name)
+    logger.info("Package.xml member: %s", package_xml_member)
     
     # ---------------------------
     # 5. Build package.xml
     # ---------------------------
-    package_xml = f"""<?xml version="1.0" encoding="UTF-8"?>
-<Package xmlns="http://soap.sforce.com/2006/04/metadata">
-    <types>
-        <members>{package_xml_member}</members>
-        <name>{package_xml_name}</name>
-    </types>
-    <version>{api_version}</version>
-</Package>
-"""
+    package_xml = _build_package_xml(package_xml_name, package_xml_member, api_version)
 
     # Print package.xml for debugging
-    print("\n=== PACKAGE.XML CONTENT ===")
-    print(package_xml)
-    print("=" * 40)
+    logger.debug("=== PACKAGE.XML CONTENT ===\n%s", package_xml.decode('utf-8'))
 
     # ---------------------------
     # 6. Create ZIP in memory
     # ---------------------------
-    print("Building ZIP package in memory...")
+    logger.info("Building ZIP package in memory...")
 
     zip_buffer = io.BytesIO()
 
@@ -197,28 +320,29 @@ def deploy_metadata_xml(instance_url: str, access_token: str, metadata_xml: str,
         # Add metadata file to the correct folder
         zip_path = f"{folder_name}/{metadata_filename}"
         zip_file.writestr(zip_path, metadata_xml)
-        print(f"Added to ZIP: {zip_path}")
 
         # Add package.xml
         zip_file.writestr("package.xml", package_xml)
-        print(f"Added to ZIP: package.xml")
         
         # Debug: List all files in zip
-        print(f"\nZIP contents:")
-        for name in zip_file.namelist():
-            print(f"  - {name}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("ZIP contents:\n%s", "\n".join(f"  - {name}" for name in zip_file.namelist()))
 
     zip_buffer.seek(0)
 
     # ---------------------------
     # 7. Send deploy request
     # ---------------------------
-    print("Sending deploy request...")
+    logger.info("Sending deploy request...")
 
     deploy_url = f"{instance_url}/services/data/v{api_version}/metadata/deployRequest"
     
-    # Create multipart boundary
-    boundary = f"----WebKitFormBoundary{uuid.uuid4().hex}"
+    # Create multipart boundary and its delimiter byte strings once
+    boundary = secrets.token_hex(16)
+    boundary_bytes = boundary.encode('ascii')
+    first_delimiter = b"--" + boundary_bytes + b"\r\n"
+    part_delimiter = b"\r\n--" + boundary_bytes + b"\r\n"
+    close_delimiter = b"\r\n--" + boundary_bytes + b"--\r\n"
     
     # Deploy options JSON
     deploy_options = {
@@ -240,15 +364,13 @@ def deploy_metadata_xml(instance_url: str, access_token: str, metadata_xml: str,
     zip_bytes = zip_buffer.getvalue()
     
     body_parts = [
-        f"--{boundary}\r\n".encode('utf-8'),
-        b'Content-Disposition: form-data; name="json"\r\n',
-        b'Content-Type: application/json\r\n\r\n',
+        first_delimiter,
+        _MULTIPART_JSON_HEADER,
         json.dumps(deploy_options).encode('utf-8'),
-        f"\r\n--{boundary}\r\n".encode('utf-8'),
-        b'Content-Disposition: form-data; name="file"; filename="metadata.zip"\r\n',
-        b'Content-Type: application/zip\r\n\r\n',
+        part_delimiter,
+        _MULTIPART_ZIP_HEADER,
         zip_bytes,
-        f"\r\n--{boundary}--\r\n".encode('utf-8')
+        close_delimiter
     ]
     
     body = b''.join(body_parts)
@@ -261,69 +383,78 @@ def deploy_metadata_xml(instance_url: str, access_token: str, metadata_xml: str,
     response = requests.post(deploy_url, headers=headers, data=body)
 
     if response.status_code >= 300:
-        print("Deployment request failed:")
-        print(response.text)
+        logger.error("Deployment request failed:\n%s", response.text)
         return
 
     deploy_id = response.json().get("id")
-    print(f"Deploy request created. ID = {deploy_id}")
+    logger.info("Deploy request created. ID = %s", deploy_id)
 
     # ---------------------------
     # 8. Poll deployment status
     # ---------------------------
-    print("\nPolling deployment status...")
+    logger.info("Polling deployment status...")
 
     status_url = f"{instance_url}/services/data/v{api_version}/metadata/deployRequest/{deploy_id}"
     headers = {"Authorization": f"Bearer {access_token}"}
 
-    while True:
-        r = requests.get(status_url, headers=headers)
-        result = r.json()
+    # The first status check is issued right away; trivial deploys are often
+    # already done. After that, back off from a short delay up to the cap.
+    poll_delay = DEPLOY_POLL_INITIAL_DELAY
+    with requests.Session() as session:
+        session.headers.update(headers)
+        while True:
+            r = session.get(status_url)
+            result = r.json()
 
-        status = result["deployResult"]["status"]
-        print(f"Status: {status}")
+            status = result["deployResult"]["status"]
+            logger.info("Status: %s", status)
 
-        if result["deployResult"]["done"]:
-            print("\n=== FINAL DEPLOY RESULT ===")
-            deploy_result = result["deployResult"]
-            
-            # Print full JSON for debugging
-            print("\nFull deploy result JSON:")
-            print(json.dumps(result, indent=2))
-            
-            if deploy_result.get("success"):
-                print(f"\n✅ Deployment successful!")
-                print(f"Components deployed: {deploy_result.get('numberComponentsDeployed', 0)}")
-            else:
-                print(f"\n❌ Deployment failed!")
-                print(f"Errors: {deploy_result.get('numberComponentErrors', 0)}")
-                print(f"Status: {deploy_result.get('status', 'Unknown')}")
-                
-                # Print component failures if any
-                if "details" in deploy_result:
-                    if "componentFailures" in deploy_result["details"]:
-                        failures = deploy_result["details"]["componentFailures"]
-                        if failures:
-                            print("\nComponent Failures:")
-                            for failure in failures:
-                                print(f"  - Full Name: {failure.get('fullName', 'Unknown')}")
-                                print(f"    Problem: {failure.get('problem', 'Unknown error')}")
-                                print(f"    File: {failure.get('fileName', 'Unknown')}")
-                                print(f"    Problem Type: {failure.get('problemType', 'Unknown')}")
-                                print()
-                    
-                    # Also print all component messages for more details
-                    if "allComponentMessages" in deploy_result["details"]:
-                        messages = deploy_result["details"]["allComponentMessages"]
-                        if messages:
-                            print("All Component Messages:")
-                            for msg in messages:
-                                if not msg.get("success", False):
-                                    print(f"  - {msg.get('fullName', 'Unknown')}: {msg.get('problem', 'Unknown error')}")
-            
-            return result
+            if result["deployResult"]["done"]:
+                break
+
+            time.sleep(poll_delay)
+            poll_delay = min(poll_delay * 2, DEPLOY_POLL_MAX_DELAY)
+
+    logger.info("=== FINAL DEPLOY RESULT ===")
+    deploy_result = result["deployResult"]
 
-        time.sleep(3)
+    # Log full JSON for debugging (only serialized when DEBUG is enabled)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Full deploy result JSON:\n%s", json.dumps(result, indent=2))
+
+    if deploy_result.get("success"):
+        logger.info("✅ Deployment successful!")
+        logger.info("Components deployed: %s", deploy_result.get('numberComponentsDeployed', 0))
+    else:
+        logger.error("❌ Deployment failed!")
+        logger.error("Errors: %s", deploy_result.get('numberComponentErrors', 0))
+        logger.error("Status: %s", deploy_result.get('status', 'Unknown'))
+
+        # Log component failures if any
+        if "details" in deploy_result:
+            if "componentFailures" in deploy_result["details"]:
+                failures = deploy_result["details"]["componentFailures"]
+                if failures:
+                    logger.error("Component Failures:")
+                    for failure in failures:
+                        logger.error(
+                            "  - Full Name: %s\n    Problem: %s\n    File: %s\n    Problem Type: %s",
+                            failure.get('fullName', 'Unknown'),
+                            failure.get('problem', 'Unknown error'),
+                            failure.get('fileName', 'Unknown'),
+                            failure.get('problemType', 'Unknown'),
+                        )
+
+            # Also log all component messages for more details
+            if "allComponentMessages" in deploy_result["details"]:
+                messages = deploy_result["details"]["allComponentMessages"]
+                if messages:
+                    logger.error("All Component Messages:")
+                    for msg in messages:
+                        if not msg.get("success", False):
+                            logger.error("  - %s: %s", msg.get('fullName', 'Unknown'), msg.get('problem', 'Unknown error'))
+
+    return result
 
 
 # --------------------------------------------------------
@@ -383,6 +514,8 @@ def deploy_metadata(metadata_xml: str) -> str:
         deploy_result = result.get("deployResult", {})
         
         if deploy_result.get("success"):
+            # Deployed metadata (e.g. a CustomObject) can change object describes
+            clear_object_fields_cache()
             components_deployed = deploy_result.get("numberComponentsDeployed", 0)
             return f"✅ Deployment successful! Deployed {components_deployed} component(s) to {instance_url}"
         else:
@@ -410,6 +543,7 @@ def deploy_metadata(metadata_xml: str) -> str:
 # TEST HARDCODED REMOTE SITE
 # --------------------------------------------------------
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
 
     # A full RemoteSiteSetting XML for testing
     TEST_REMOTE_SITE_XML = """<?xml version="1.0" encoding="UTF-8"?>
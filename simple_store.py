@@ -2,9 +2,11 @@
 Simple key-value store for persisting data.
 Uses a JSON file for storage - perfect for POC/hackathon use.
 """
+import hashlib
 import json
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, Optional
 
 
 class SimpleStore:
@@ -36,6 +38,11 @@ class SimpleStore:
         
         # Clear everything
         store.clear()
+        
+        # Group several writes into a single file rewrite
+        with store.batch():
+            store.set("org_name", "production")
+            store.set("api_version", "60.0")
     """
     
     def __init__(self, store_file: str = "org_data.json"):
@@ -45,24 +52,88 @@ class SimpleStore:
             store_file: Name of the JSON file to use for storage (default: "org_data.json")
         """
         self.store_file = Path(store_file)
+        # In-memory copy of the data while a batch() block is open
+        self._batch_data: Optional[Dict[str, Any]] = None
+        self._batch_dirty = False
+        # Digest of the file contents as last read or written by this instance
+        self._last_hash: Optional[bytes] = None
         if not self.store_file.exists():
             self._save({})
     
+    @staticmethod
+    def _digest(content: str) -> bytes:
+        """Cheap fingerprint of the serialized store contents."""
+        return hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+    
     def _load(self) -> Dict[str, Any]:
-        """Load data from file."""
+        """Load data from file (or from memory while batching)."""
+        if self._batch_data is not None:
+            return self._batch_data
+        
         if not self.store_file.exists():
+            self._last_hash = None
             return {}
         
         try:
             with open(self.store_file, 'r') as f:
-                return json.load(f)
+                content = f.read()
+            data = json.loads(content)
         except (json.JSONDecodeError, IOError):
+            self._last_hash = None
             return {}
+        self._last_hash = self._digest(content)
+        return data
     
     def _save(self, data: Dict[str, Any]):
-        """Save data to file."""
+        """Save data to file, skipping the write if the contents are unchanged.
+        
+        The skip compares against the digest from this instance's last read
+        or write, so callers must _load() first to pick up changes made by
+        other instances.
+        """
+        content = json.dumps(data, indent=2)
+        digest = self._digest(content)
+        if digest == self._last_hash and self.store_file.exists():
+            return
         with open(self.store_file, 'w') as f:
-            json.dump(data, f, indent=2)
+            f.write(content)
+        self._last_hash = digest
+    
+    def _write(self, data: Dict[str, Any]):
+        """Persist data, or defer the write until the open batch() exits."""
+        if self._batch_data is not None:
+            self._batch_data = data
+            self._batch_dirty = True
+            return
+        self._save(data)
+    
+    @contextmanager
+    def batch(self) -> Iterator["SimpleStore"]:
+        """Defer file writes until the end of the block.
+        
+        Every set/delete/clear normally rewrites the whole JSON file. Inside
+        a batch the data is loaded once, changed in memory, and written a
+        single time when the block exits. Nested batches join the outer one.
+        
+        Example:
+            with store.batch():
+                store.set("org_name", "production")
+                store.set("api_version", "60.0")
+        """
+        if self._batch_data is not None:
+            yield self
+            return
+        
+        self._batch_data = self._load()
+        self._batch_dirty = False
+        try:
+            yield self
+        finally:
+            data, dirty = self._batch_data, self._batch_dirty
+            self._batch_data = None
+            self._batch_dirty = False
+            if dirty:
+                self._save(data)
     
     def set(self, key: str, value: Any):
         """Set a key-value pair.
@@ -77,7 +148,7 @@ class SimpleStore:
         """
         data = self._load()
         data[key] = value
-        self._save(data)
+        self._write(data)
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get a value by key.
@@ -106,7 +177,7 @@ class SimpleStore:
             all_data = store.get_all()
             print(all_data)  # {'org_name': 'production', 'org_details': {...}}
         """
-        return self._load()
+        return dict(self._load())
     
     def delete(self, key: str) -> bool:
         """Delete a key.
@@ -123,7 +194,7 @@ class SimpleStore:
         data = self._load()
         if key in data:
             del data[key]
-            self._save(data)
+            self._write(data)
             return True
         return False
     
@@ -133,7 +204,10 @@ class SimpleStore:
         Example:
             store.clear()  # Removes all stored data
         """
-        self._save({})
+        # Refresh the digest so a write from another instance isn't mistaken
+        # for the empty store this instance last saw
+        self._load()
+        self._write({})
 
 
 # Example usage
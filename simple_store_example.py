@@ -19,9 +19,10 @@ if org_details:
     print(f"Retrieved org details: {org_details['instance_url']}\n")
     # Use org_details["instance_url"] and org_details["access_token"] for deployment
 
-# Example 3: Save any data
-store.set("last_deployment", "RemoteSiteSetting")
-store.set("environment", "production")
+# Example 3: Save any data (batched into a single file write)
+with store.batch():
+    store.set("last_deployment", "RemoteSiteSetting")
+    store.set("environment", "production")
 
 # Example 4: Get all stored data
 all_data = store.get_all()
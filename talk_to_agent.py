@@ -1,5 +1,8 @@
 import sys
 import os
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
 
 # Add the project root to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -8,10 +11,31 @@ from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.prebuilt import create_react_agent
 from llms.base_classes.chatmodel import EinsteinChatModel
 from langchain_core.tools import tool
-from metadata_processor import get_metadata_information
+from metadata_processor import get_metadata_information, prefetch_metadata_information
 from org_utils import deploy_metadata
-from data_utils import fetch_object_fields_map, deploy_csv_records
-from langchain_core.messages import AIMessage
+from data_utils import fetch_object_fields_map, deploy_csv_records, check_csv_deploy_status
+from org_connection import connect_to_salesforce_org
+from langchain_core.messages import AIMessage, ToolMessage
+
+# When the model emits several tool calls in one turn, LangGraph's ToolNode runs
+# them concurrently on a thread pool. The tools block on Salesforce HTTP calls,
+# so this caps how many are in flight at once.
+TOOL_CONCURRENCY_LIMIT = int(os.getenv("TOOL_CONCURRENCY_LIMIT", "8"))
+AGENT_CONFIG = {"max_concurrency": TOOL_CONCURRENCY_LIMIT}
+
+# Conversation trimming: once the history is estimated to exceed this many
+# tokens (~4 characters per token), older turns are replaced by a summary and
+# only the most recent user turns are kept verbatim.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+KEEP_RECENT_TURNS = 3
+_CHARS_PER_TOKEN = 4
+# Older turns are only (re-)summarized once at least this many tokens have
+# accumulated outside the kept window since the last summary, so a history
+# whose recent turns alone exceed the budget isn't summarized every turn.
+SUMMARIZE_MIN_TOKENS = int(os.getenv("SUMMARIZE_MIN_TOKENS", "1500"))
+_SUMMARY_MESSAGE_ID = "conversation-summary"
+
+SUMMARY_INSTRUCTIONS = """Summarize the following conversation between a user and a Salesforce automation assistant so it can continue without the full history. Keep: whether a Salesforce org is connected, metadata types and objects discussed, what was generated or deployed and the results, errors encountered, and any open requests. Be concise."""
 
 # System instructions for the agent
 SYSTEM_INSTRUCTIONS = """You are a Salesforce automation assistant that helps users create and deploy metadata and data to Salesforce orgs. Your primary responsibilities are:
@@ -92,6 +116,7 @@ When a user requests sample data creation (e.g., "create 50 Account records", "g
 3. **Deploy Records**: Use the `deploy_csv_records` tool with:
    - `csv_content`: The generated CSV content as a string
    - `sobject`: The entity's API name
+   - `wait_for_completion`: Leave as true (default) to get the results directly. Set it to false when there is other independent work to do (e.g. generating more metadata or data); the tool then returns a Bulk API job ID right away, and you must later call `check_csv_deploy_status` with that job ID to get the results
 
 4. **Report Results**: Inform the user about:
    - Number of records successfully created
@@ -120,26 +145,54 @@ You have access to the full conversation history. When a user requests modificat
 3. **Error Handling**: If a tool call fails or returns an error, explain the issue to the user and suggest alternatives.
 
 4. **Efficiency**: Use tools proactively to gather information before generating content. This ensures accuracy and reduces deployment failures.
+   - Plan all the lookups a request needs up front. When several tool calls do not depend on each other's results (e.g. `get_metadata_information` for a metadata type and `fetch_object_fields_map` for one or more objects), request them together in a single response instead of one per turn - they are executed in parallel.
+   - Only wait for a tool result before the next call when the next call actually needs it.
 
 5. **User Intent**: Clarify ambiguous requests. If a user says "create settings", confirm whether they mean Settings metadata types (SurveySettings, etc.) or CustomObject settings.
 
 Remember: Your goal is to help users efficiently create and deploy Salesforce metadata and data with minimal errors and maximum accuracy."""
 
+# Built once and shared by every conversation. The fixed id keeps LangGraph's
+# message reducer from assigning (i.e. mutating) an id on the shared object.
+SYSTEM_MESSAGE = SystemMessage(content=SYSTEM_INSTRUCTIONS, id="system-instructions")
 
-def talk_to_agent(query: str, system_instructions: str = None):
-    """Talk to the agent.
+
+# Tools available to the agents, by name
+_TOOLS = {
+    t.name: t
+    for t in (
+        connect_to_salesforce_org, get_metadata_information, deploy_metadata,
+        fetch_object_fields_map, deploy_csv_records, check_csv_deploy_status,
+    )
+}
+
+# Tool sets for one-off queries and for conversations (interactive chat and
+# the Slack bot), which follow the full SYSTEM_INSTRUCTIONS workflow
+QUERY_TOOLS = ("get_metadata_information",)
+CHAT_TOOLS = (
+    "connect_to_salesforce_org", "get_metadata_information", "deploy_metadata",
+    "fetch_object_fields_map", "deploy_csv_records", "check_csv_deploy_status",
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_model():
+    """Create the Einstein chat model once; it is shared by every agent."""
+    return EinsteinChatModel(api_key="sample", disable_streaming=True)
+
+
+@functools.lru_cache(maxsize=8)
+def get_agent(tool_names: tuple = QUERY_TOOLS):
+    """Build the react agent for a set of tool names once and reuse it.
     
-    Args:
-        query: The user's query/request
-        system_instructions: Optional system instructions. If not provided, uses default SYSTEM_INSTRUCTIONS.
+    System instructions are sent as messages, so they don't need to be part
+    of the cache key.
     """
+    return create_react_agent(_get_model(), tools=[_TOOLS[name] for name in tool_names])
 
-    # Initialize the Einstein model
-    model = EinsteinChatModel(api_key="sample", disable_streaming=True)
-
-    # Create agent with metadata information tool
-    agent = create_react_agent(model, tools=[get_metadata_information]) 
 
+def _build_messages(query: str, system_instructions: str = None) -> list:
+    """Build the message list for a one-off query."""
     # Prepare messages with system instructions
     messages = []
     
@@ -147,34 +200,190 @@ def talk_to_agent(query: str, system_instructions: str = None):
     if system_instructions:
         messages.append(SystemMessage(content=system_instructions))
     elif SYSTEM_INSTRUCTIONS:
-        messages.append(SystemMessage(content=SYSTEM_INSTRUCTIONS))
+        messages.append(SYSTEM_MESSAGE)
     
     # Add user message
     messages.append(HumanMessage(content=query))
+    return messages
+
+
+def talk_to_agent(query: str, system_instructions: str = None, tool_names: tuple = QUERY_TOOLS):
+    """Talk to the agent.
+    
+    Args:
+        query: The user's query/request
+        system_instructions: Optional system instructions. If not provided, uses default SYSTEM_INSTRUCTIONS.
+        tool_names: Names of the tools the agent may use (default: QUERY_TOOLS).
+    """
+
+    # Reuse the agent for this tool set across calls
+    agent = get_agent(tool_names)
 
     result = agent.invoke({
-        "messages": messages
-    })
+        "messages": _build_messages(query, system_instructions)
+    }, config=AGENT_CONFIG)
+
+    return result['messages'][-1].content
+
+
+def talk_to_agent_batch(queries: list, system_instructions: str = None, max_concurrency: int = 16,
+                        tool_names: tuple = QUERY_TOOLS) -> list:
+    """Run several independent queries through the agent at once.
+    
+    Uses the agent's batch() so the queries run concurrently instead of one
+    after another, which is useful for evaluating the agent over a dataset.
+    
+    Args:
+        queries: List of user queries/requests
+        system_instructions: Optional system instructions. If not provided, uses default SYSTEM_INSTRUCTIONS.
+        max_concurrency: Maximum number of queries in flight at once (default: 16)
+        tool_names: Names of the tools the agent may use (default: QUERY_TOOLS).
+    
+    Returns:
+        List of agent responses, in the same order as queries
+    """
+    agent = get_agent(tool_names)
+
+    results = agent.batch(
+        [{"messages": _build_messages(query, system_instructions)} for query in queries],
+        config={"max_concurrency": max_concurrency},
+    )
+
+    return [result['messages'][-1].content for result in results]
+
+
+async def talk_to_agent_async(query: str, system_instructions: str = None, tool_names: tuple = QUERY_TOOLS):
+    """Async version of talk_to_agent.
+    
+    Runs the agent with ainvoke so callers on an event loop can overlap several
+    queries (e.g. with asyncio.gather) instead of blocking on each one. The
+    synchronous tools are run in LangGraph's executor, off the event loop.
+    
+    Args:
+        query: The user's query/request
+        system_instructions: Optional system instructions. If not provided, uses default SYSTEM_INSTRUCTIONS.
+        tool_names: Names of the tools the agent may use (default: QUERY_TOOLS).
+    """
+    agent = get_agent(tool_names)
+
+    result = await agent.ainvoke({
+        "messages": _build_messages(query, system_instructions)
+    }, config=AGENT_CONFIG)
 
     return result['messages'][-1].content
 
 
+# Background worker for speculative metadata lookups in interactive_chat
+_prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="metadata-prefetch")
+
+
+def get_last_agent_response(messages: list) -> str:
+    """Return the content of the most recent AIMessage in a conversation.
+    
+    Scans backwards from the end, where the agent's reply almost always is,
+    instead of filtering the whole (growing) history every turn.
+    """
+    for msg in reversed(messages):
+        if isinstance(msg, AIMessage):
+            return msg.content
+    # Fallback: get last message content
+    return messages[-1].content if messages else "No response"
+
+
+def trim_conversation(messages: list) -> list:
+    """Cap conversation growth with a sliding window plus a rolling summary.
+    
+    When the estimated size of messages exceeds CONTEXT_TOKEN_BUDGET, everything
+    between the leading system message and the last KEEP_RECENT_TURNS user turns
+    is summarized by the model into a single SystemMessage. The window always
+    starts at a HumanMessage so tool calls stay paired with their results, and
+    recent outputs (e.g. the last XML) are kept verbatim. A previous summary is
+    folded into the new one, which is only made once SUMMARIZE_MIN_TOKENS of
+    new turns have left the window. If summarization fails, the older turns
+    are dropped (keeping any previous summary) so the history stays bounded.
+    
+    This makes a model call, so callers run it after the reply has been shown.
+    
+    Returns:
+        The trimmed message list, or messages unchanged if under budget
+    """
+    total_chars = sum(len(str(msg.content)) for msg in messages)
+    if total_chars <= CONTEXT_TOKEN_BUDGET * _CHARS_PER_TOKEN:
+        return messages
+    
+    human_indexes = [i for i, msg in enumerate(messages) if isinstance(msg, HumanMessage)]
+    if len(human_indexes) <= KEEP_RECENT_TURNS:
+        return messages
+    window_start = human_indexes[-KEEP_RECENT_TURNS]
+    
+    head = messages[:1] if isinstance(messages[0], SystemMessage) else []
+    older = messages[len(head):window_start]
+    unsummarized = [msg for msg in older if msg.id != _SUMMARY_MESSAGE_ID]
+    if sum(len(str(msg.content)) for msg in unsummarized) < SUMMARIZE_MIN_TOKENS * _CHARS_PER_TOKEN:
+        return messages
+    transcript = "\n\n".join(f"{type(msg).__name__}: {msg.content}" for msg in older)
+    
+    try:
+        summary = _get_model().invoke([
+            SystemMessage(content=SUMMARY_INSTRUCTIONS),
+            HumanMessage(content=transcript),
+        ]).content
+    except Exception as e:
+        print(f"Warning: Failed to summarize conversation history, dropping older turns: {e}")
+        # Keep the previous summary so earlier context (e.g. the connected org) survives
+        previous_summary = [msg for msg in older if msg.id == _SUMMARY_MESSAGE_ID]
+        return head + previous_summary + messages[window_start:]
+    
+    summary_message = SystemMessage(
+        content=f"Summary of the earlier conversation:\n{summary}", id=_SUMMARY_MESSAGE_ID
+    )
+    return head + [summary_message] + messages[window_start:]
+
+
+def _format_tool_calls(message):
+    if message.tool_calls:
+        tool_names = ", ".join(tool_call["name"] for tool_call in message.tool_calls)
+        return f"🔧 Calling: {tool_names}"
+    return None
+
+
+def _format_tool_result(message):
+    return f"📦 {message.name} finished"
+
+
+# Chat separators, built once instead of on every turn
+_BANNER = "=" * 60
+_TURN_SEPARATOR = "-" * 60
+
+
+# Progress formatters by exact message type (one dict lookup per message)
+_PROGRESS_FORMATTERS = {
+    AIMessage: _format_tool_calls,
+    ToolMessage: _format_tool_result,
+}
+
+
+def _format_progress(message):
+    """Return a one-line progress note for an intermediate agent step, or None."""
+    formatter = _PROGRESS_FORMATTERS.get(type(message))
+    return formatter(message) if formatter else None
+
+
 def interactive_chat():
     """Interactive chat loop - like a Slack bot in the terminal."""
-    print("=" * 60)
+    print(_BANNER)
     print("🤖 OrgMagic Agent - Interactive Chat")
-    print("=" * 60)
+    print(_BANNER)
     print("Type your questions or requests. Type 'exit', 'quit', or 'bye' to end the chat.\n")
     
-    # Initialize the model and agent once (more efficient)
-    model = EinsteinChatModel(api_key="sample", disable_streaming=True)
-    agent = create_react_agent(model, tools=[get_metadata_information, deploy_metadata, fetch_object_fields_map, deploy_csv_records])
+    # Reuse the shared model and chat agent
+    agent = get_agent(CHAT_TOOLS)
     
     # Conversation history
     conversation_messages = []
     
     # Add system message to conversation
-    conversation_messages.append(SystemMessage(content=SYSTEM_INSTRUCTIONS))
+    conversation_messages.append(SYSTEM_MESSAGE)
     
     while True:
         try:
@@ -190,36 +399,59 @@ def interactive_chat():
             if not user_input:
                 continue
             
+            # Speculatively parse metadata docs for any types the user mentioned
+            # while the model works on its first response; the agent's
+            # get_metadata_information call then hits the warm cache.
+            _prefetch_executor.submit(prefetch_metadata_information, user_input)
+            
             # Add user message to conversation
             conversation_messages.append(HumanMessage(content=user_input))
             
             # Get response from agent
+            # Stream each step's new messages so tool calls show up as they
+            # happen instead of only after the whole run has finished.
+            # stream_mode="updates" yields {node_name: {"messages": [new messages]}},
+            # i.e. only the delta, not the whole (growing) history every step.
+            # (The Einstein model returns whole responses, so there are no token deltas.)
             print("🤔 Thinking...")
-            result = agent.invoke({
+            new_messages = []
+            add_message = new_messages.append
+            for step in agent.stream({
                 "messages": conversation_messages
-            })
+            }, config=AGENT_CONFIG, stream_mode="updates"):
+                progress_lines = []
+                for update in step.values():
+                    if not update:
+                        continue
+                    for message in update.get("messages", ()):
+                        line = _format_progress(message)
+                        if line:
+                            progress_lines.append(line)
+                        add_message(message)
+                # One write per step instead of one print per message
+                if progress_lines:
+                    sys.stdout.write("\n".join(progress_lines) + "\n")
+                    sys.stdout.flush()
             
-            # IMPORTANT: LangGraph returns ALL messages (including tool calls and tool results)
-            # The result['messages'] contains the full conversation history with new messages appended
-            # We should use the returned messages as our new conversation state
+            # IMPORTANT: The agent produces ALL messages (including tool calls and tool results)
+            # Appending them gives the full conversation history for the next turn
             # This ensures the agent has access to:
             # - All previous user inputs
             # - All previous agent outputs (including XMLs)
             # - All tool calls and their results
-            conversation_messages = result['messages']
+            conversation_messages.extend(new_messages)
             
             # Get the agent's final response (last message is usually the AI response)
-            # Filter for the last AIMessage (agent's response, not tool calls)
-            agent_responses = [msg for msg in conversation_messages if isinstance(msg, AIMessage)]
-            if agent_responses:
-                agent_response = agent_responses[-1].content
-            else:
-                # Fallback: get last message content
-                agent_response = conversation_messages[-1].content if conversation_messages else "No response"
+            # Find the last AIMessage (agent's response, not tool calls)
+            agent_response = get_last_agent_response(conversation_messages)
             
             # Display response
             print(f"\n🤖 Agent: {agent_response}\n")
-            print("-" * 60)
+            print(_TURN_SEPARATOR)
+            
+            # Keep the history sent to the model bounded for the next turn
+            # (after the reply is shown, since this may call the model)
+            conversation_messages = trim_conversation(conversation_messages)
             
             # Debug: Show conversation length (optional, can remove later)
             # print(f"[Debug: Conversation has {len(conversation_messages)} messages]")
@@ -233,6 +465,9 @@ def interactive_chat():
 
 
 if __name__ == "__main__":
+    # Show tool progress (e.g. metadata deploy status) on the console
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     # Run interactive chat
     interactive_chat()
     
@@ -0,0 +1,15 @@
+import json
+
+from simple_store import SimpleStore
+
+
+def test_clear_overwrites_data_written_by_another_instance(tmp_path):
+    store_file = tmp_path / "store.json"
+    a = SimpleStore(str(store_file))
+    b = SimpleStore(str(store_file))
+
+    b.set("org", "prod")
+    a.clear()
+
+    assert json.loads(store_file.read_text()) == {}
+    assert b.get_all() == {}
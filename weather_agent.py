@@ -1,16 +1,28 @@
 #!/usr/bin/env python3
 import sys
 import os
-import requests
+import functools
 
 # Add the project root to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from langchain_core.caches import InMemoryCache
 from langchain_core.messages import HumanMessage
-from langgraph.prebuilt import create_react_agent
-from llms.base_classes.chatmodel import EinsteinChatModel
 from langchain_core.tools import tool  # ADD this import
 
+# Mock weather data for demonstration, keyed by lower-cased city name with
+# the full response pre-formatted (built once at import)
+WEATHER_RESPONSES = {
+    city.lower(): f"Current weather in {city}: {conditions}"
+    for city, conditions in (
+        ("San Francisco", "Cloudy, 65°F (18°C), Light fog expected"),
+        ("New York", "Partly sunny, 72°F (22°C), Clear skies"),
+        ("London", "Rainy, 58°F (14°C), Heavy rainfall"),
+        ("Tokyo", "Sunny, 75°F (24°C), Perfect weather"),
+    )
+}
+
+
 # ADD this tool function:
 @tool
 def get_weather(city: str) -> str:
@@ -22,43 +34,72 @@ def get_weather(city: str) -> str:
     Returns:
         Weather information for the specified city
     """
-    # Mock weather data for demonstration
-    weather_data = {
-        "san francisco": "Cloudy, 65°F (18°C), Light fog expected",
-        "new york": "Partly sunny, 72°F (22°C), Clear skies",
-        "london": "Rainy, 58°F (14°C), Heavy rainfall",
-        "tokyo": "Sunny, 75°F (24°C), Perfect weather",
-    }
+    response = WEATHER_RESPONSES.get(city.lower())
+    if response is not None:
+        return response
+    return f"Weather data not available for {city}."
+
+
+@functools.lru_cache(maxsize=1)
+def _get_agent():
+    """Create the Einstein model and weather agent once and reuse them.
+
+    LangGraph and the model client are imported here rather than at module
+    level, so importing get_weather on its own stays cheap.
+    """
+    from langgraph.prebuilt import create_react_agent
+    from llms.base_classes.chatmodel import EinsteinChatModel
 
-    city_lower = city.lower()
-    if city_lower in weather_data:
-        return f"Current weather in {city}: {weather_data[city_lower]}"
-    else:
-        return f"Weather data not available for {city}."
+    # Answer repeated identical model calls (same messages and model settings)
+    # from memory instead of going back to the Einstein gateway. The cache is
+    # set on this model only, not installed globally, and lives as long as
+    # the agent.
+    model = EinsteinChatModel(
+        api_key="sample", disable_streaming=True, cache=InMemoryCache(maxsize=512)
+    )
+    return create_react_agent(model, tools=[get_weather])
 
 
-def main():
-    """Test our weather agent."""
+DEFAULT_QUERY = "What's the weather like in San Francisco?"
 
-    # Initialize the Einstein model
-    model = EinsteinChatModel(api_key="sample", disable_streaming=True)
+# Most queries in flight against the Einstein gateway at once when several are
+# batched together
+GATEWAY_CONCURRENCY_LIMIT = int(os.getenv("GATEWAY_CONCURRENCY_LIMIT", "4"))
+
+
+def main(queries=None, verbose=None):
+    """Test our weather agent.
+
+    Args:
+        queries: Questions to ask. Defaults to a single San Francisco
+                 question. Several queries are run concurrently in one batch.
+        verbose: Also print the full agent state (every message) for each
+                 query. Defaults to the VERBOSE environment variable.
+    """
+    if verbose is None:
+        verbose = os.getenv("VERBOSE") == "1"
 
-    # Create agent with NO tools
-    agent = create_react_agent(model, tools=[get_weather])  # Empty tools list
+    # Reuse the model and agent (with the weather tool)
+    agent = _get_agent()
 
-    query = "What's the weather like in San Francisco?"
-    # Ask the agent our question
-    result = agent.invoke({
-        "messages": [HumanMessage(content=query)]
-    })
+    queries = queries or [DEFAULT_QUERY]
+    # Ask the agent our questions
+    results = agent.batch(
+        [{"messages": [HumanMessage(content=query)]} for query in queries],
+        config={"max_concurrency": GATEWAY_CONCURRENCY_LIMIT},
+    )
 
-    print("\n")
+    for query, result in zip(queries, results):
+        print("\n")
 
-    print(result)
+        if verbose:
+            print(result)
 
-    # Get the agent's response
-    response = result['messages'][-1].content
-    print(f"🤖 Agent Response: {response}")
+        # Get the agent's response
+        response = result['messages'][-1].content
+        print(f"💬 Query: {query}")
+        print(f"🤖 Agent Response: {response}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Questions can be given as command-line arguments
+    main(sys.argv[1:] or None)
\ No newline at end of file